@@ -1,16 +1,72 @@
 from __future__ import annotations
 
+import os
 from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
 
-from .schemas import Settings
+from minio import Minio
+
+if TYPE_CHECKING:
+    from .schemas import Settings
+
+_settings: Optional[Settings] = None
+_settings_env_mtime_ns: Optional[int] = None
+
+
+def _env_mtime_ns() -> Optional[int]:
+    try:
+        return os.stat(".env").st_mtime_ns
+    except OSError:
+        return None
 
 
-@lru_cache
 def get_settings() -> Settings:
     """
     Load settings using pydantic BaseSettings.
 
     - Reads from .env (because Settings.model_config has env_file=".env")
     - Uses env_nested_delimiter="__" for nested keys
+
+    The instance is cached, keyed on .env's mtime: editing .env rebuilds the
+    settings on the next call (no kernel restart needed), while the hot path
+    costs one os.stat plus an int compare instead of a full reparse.
+    """
+    global _settings, _settings_env_mtime_ns
+
+    # Deferred import: pydantic/pydantic-settings dominate this package's
+    # import time, so importing config.loader stays cheap until settings
+    # are actually needed.
+    from .schemas import Settings
+
+    mtime = _env_mtime_ns()
+    if _settings is None or mtime != _settings_env_mtime_ns:
+        _settings = Settings()
+        _settings_env_mtime_ns = mtime
+    return _settings
+
+
+def _clear_settings() -> None:
+    """Drop the cached Settings so the next get_settings() reloads."""
+    global _settings, _settings_env_mtime_ns
+    _settings = None
+    _settings_env_mtime_ns = None
+
+
+get_settings.clear = _clear_settings
+
+
+@lru_cache(maxsize=4)
+def get_minio(
+    endpoint: str,
+    access_key: str,
+    secret_key: str,
+    secure: bool = True,
+) -> Minio:
+    """
+    Shared Minio client per (endpoint, access_key, secure) triple.
+
+    Radar and satellite clients point at the same MinIO instance – caching
+    here lets them share one urllib3 connection pool and TLS context instead
+    of each building their own.
     """
-    return Settings()
+    return Minio(endpoint, access_key=access_key, secret_key=secret_key, secure=secure)
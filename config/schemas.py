@@ -1,13 +1,22 @@
 # config/schemas.py
 from __future__ import annotations
+from functools import cached_property, lru_cache
 from typing import List, Optional, Tuple, Literal, Iterable
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from urllib.parse import quote_plus
 import ssl
 import os
 
 
+@lru_cache(maxsize=4)
+def _expand(p: Optional[str]) -> Optional[str]:
+    """Expand ~ and relative cert paths (cached – abspath hits getcwd)."""
+    if not p:
+        return p
+    return os.path.abspath(os.path.expanduser(p))
+
+
 Role = Literal["reader", "writer"]
 
 
@@ -19,12 +28,21 @@ class DBConnSettings(BaseModel):
     password: Optional[str] = None
     database: str
 
+    # URL-quoted credentials never change after validation – compute once
+    # instead of per build_sqlalchemy_url call.
+    _user_quoted: str = PrivateAttr(default="")
+    _pwd_quoted: str = PrivateAttr(default="")
+
+    @model_validator(mode="after")
+    def _precompute_quoted(self):
+        self._user_quoted = quote_plus(self.username)
+        self._pwd_quoted = f":{quote_plus(self.password)}" if self.password else ""
+        return self
+
     def build_sqlalchemy_url(self, host: Optional[str] = None, port: Optional[int] = None) -> str:
         h = host or self.host
         p = port or self.port
-        user = quote_plus(self.username)
-        pwd = f":{quote_plus(self.password)}" if self.password else ""
-        return f"{self.drivername}://{user}{pwd}@{h}:{p}/{self.database}"
+        return f"{self.drivername}://{self._user_quoted}{self._pwd_quoted}@{h}:{p}/{self.database}"
 
 
 class SSLSettings(BaseModel):
@@ -33,17 +51,33 @@ class SSLSettings(BaseModel):
     sslrootcert: Optional[str] = None
     sslkey: Optional[str] = None
 
-    def build_asyncpg_ssl(self) -> Optional[ssl.SSLContext]:
-        mode = (self.sslmode or "").lower()
+    # sslmode is fixed after validation – lower it once instead of per use.
+    _mode_lc: str = PrivateAttr(default="")
+
+    @model_validator(mode="after")
+    def _precompute_mode(self):
+        self._mode_lc = (self.sslmode or "").lower()
+        return self
+
+    @cached_property
+    def asyncpg_ssl(self) -> Optional[ssl.SSLContext]:
+        """
+        SSLContext for asyncpg, built once per settings instance.
+
+        create_default_context re-reads and re-parses the CA file from disk,
+        so this is cached instead of rebuilt per connection. SSLContext
+        objects are safe to share across connections.
+        """
+        mode = self._mode_lc
 
         if mode in {"disable", "allow", "prefer"}:
             return None
 
-        cafile = self._expand(self.sslrootcert)
+        cafile = _expand(self.sslrootcert)
         ctx = ssl.create_default_context(cafile=cafile if cafile else None)
 
-        certfile = self._expand(self.sslcert)
-        keyfile = self._expand(self.sslkey)
+        certfile = _expand(self.sslcert)
+        keyfile = _expand(self.sslkey)
         if certfile and keyfile:
             ctx.load_cert_chain(certfile=certfile, keyfile=keyfile)
 
@@ -56,11 +90,9 @@ class SSLSettings(BaseModel):
 
         return ctx
 
-    @staticmethod
-    def _expand(p: Optional[str]) -> Optional[str]:
-        if not p:
-            return p
-        return os.path.abspath(os.path.expanduser(p))
+    def build_asyncpg_ssl(self) -> Optional[ssl.SSLContext]:
+        """Back-compat wrapper around the cached asyncpg_ssl property."""
+        return self.asyncpg_ssl
 
     def as_connect_args(self) -> dict:
         d = {"sslmode": self.sslmode}
@@ -1,17 +1,54 @@
 import os
+import orjson
 import requests
-from typing import Dict, Any, List, Optional
+from functools import lru_cache
+from requests.adapters import HTTPAdapter, Retry
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
 
+# str(bool).lower() results are fixed – precompute once instead of per call.
+_TRUE = "true"
+_FALSE = "false"
+
+# Shared session: keeps connections alive across fetch_* calls so paginating
+# (limit/offset loops) reuses one TCP/TLS connection instead of opening a new
+# one per request.
+_session: requests.Session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+
+@lru_cache(maxsize=1)
 def api_base() -> str:
     return os.getenv("IOT_API_BASE", "http://localhost:8030").rstrip("/")
 
+
+@lru_cache(maxsize=1)
 def iot_url() -> str:
     return f"{api_base()}/iot"
 
+
+@lru_cache(maxsize=1)
 def _auth_headers() -> dict:
     token = os.getenv("IOT_API_TOKEN")
     return {"Authorization": f"Bearer {token}"} if token else {}
 
+
+@lru_cache(maxsize=64)
+def _encode_static(pairs: Tuple[Tuple[str, Any], ...]) -> str:
+    """
+    URL-encode the paging-invariant query params once per combination.
+
+    When paginating, only limit/offset change between calls – the rest of
+    the query string is encoded here a single time and appended to.
+    """
+    return urlencode(pairs, doseq=True)
+
 def fetch_iot(
     *,
     dev_eui: Optional[str] = None,
@@ -26,23 +63,28 @@ def fetch_iot(
     offset: int = 0,
     timeout: int = 60,
 ) -> List[Dict[str, Any]]:
-    params = {
-        "hours": hours,
-        "only_with_known_location": str(only_with_known_location).lower(),
-        "source": source,
-        "order": order,
-        "limit": limit,
-        "offset": offset,
-    }
-    if dev_eui: params["dev_eui"] = dev_eui
-    if city: params["city"] = city
-    if from_ts: params["from_ts"] = from_ts
-    if to_ts: params["to_ts"] = to_ts
-
-    r = requests.get(iot_url(), params=params, headers=_auth_headers(), timeout=timeout)
+    static_pairs = (
+        ("hours", hours),
+        ("only_with_known_location", _TRUE if only_with_known_location else _FALSE),
+        ("source", source),
+        ("order", order),
+    ) + tuple(
+        (name, value)
+        for name, value in (
+            ("dev_eui", dev_eui),
+            ("city", city),
+            ("from_ts", from_ts),
+            ("to_ts", to_ts),
+        )
+        if value
+    )
+
+    url = f"{iot_url()}?{_encode_static(static_pairs)}&limit={limit}&offset={offset}"
+    r = _session.get(url, headers=_auth_headers(), timeout=timeout)
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content)
 
+@lru_cache(maxsize=1)
 def gauges_url() -> str:
     """
     Base URL for the /gauges endpoint.
@@ -72,30 +114,23 @@ def fetch_gauges(
 
     Parameters mirror the FastAPI /gauges query model (GaugeQuery).
     """
-    params: Dict[str, Any] = {
-        "hours": hours,
-        "only_with_known_location": str(only_with_known_location).lower(),
-        "order": order,
-        "limit": limit,
-        "offset": offset,
-    }
-
-    if city:
-        params["city"] = city
-    if station_name:
-        params["station_name"] = station_name
-    if channel:            # "DWD", "LANUK", "WNH"
-        params["channel"] = channel
-    if from_ts:
-        params["from_ts"] = from_ts
-    if to_ts:
-        params["to_ts"] = to_ts
-
-    r = requests.get(
-        gauges_url(),
-        params=params,
-        headers=_auth_headers(),
-        timeout=timeout,
+    static_pairs = (
+        ("hours", hours),
+        ("only_with_known_location", _TRUE if only_with_known_location else _FALSE),
+        ("order", order),
+    ) + tuple(
+        (name, value)
+        for name, value in (
+            ("city", city),
+            ("station_name", station_name),
+            ("channel", channel),   # "DWD", "LANUK", "WNH"
+            ("from_ts", from_ts),
+            ("to_ts", to_ts),
+        )
+        if value
     )
+
+    url = f"{gauges_url()}?{_encode_static(static_pairs)}&limit={limit}&offset={offset}"
+    r = _session.get(url, headers=_auth_headers(), timeout=timeout)
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content)
@@ -0,0 +1,88 @@
+"""
+On-disk cache for /radar and /satellite metadata responses.
+
+Responses for historical windows (explicit to_ts well in the past) are
+immutable, so re-running a notebook session can reuse the bytes from the
+previous run instead of re-hitting the API. Entries are keyed by a hash of
+the full request URL and stored gzip-compressed under ~/.cache/heavyrain.
+
+"last N hours" queries (implicit to_ts = now) are never cached – their
+answer changes between calls.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+# Historical windows do not change – a day is a safe default before we
+# re-validate against the API anyway.
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+_CACHE_DIR = Path(os.path.expanduser("~")) / ".cache" / "heavyrain"
+
+
+def _cache_path(url: str) -> Path:
+    key = hashlib.blake2b(url.encode("utf-8"), digest_size=16).hexdigest()
+    return _CACHE_DIR / f"{key}.json.gz"
+
+
+def is_historical(to_ts: Optional[datetime]) -> bool:
+    """
+    True if a window ending at to_ts is safe to cache: the bound is explicit
+    and lies more than an hour in the past, so new rows can no longer appear
+    inside it.
+    """
+    if to_ts is None:
+        return False
+    if to_ts.tzinfo is None:
+        to_ts = to_ts.replace(tzinfo=timezone.utc)
+    return to_ts < datetime.now(timezone.utc) - timedelta(hours=1)
+
+
+def load(url: str, ttl: float = DEFAULT_TTL_SECONDS) -> Optional[bytes]:
+    """
+    Return the cached response body for url, or None on miss/expiry.
+
+    A corrupt entry (truncated/garbled gzip raises EOFError/zlib.error) is
+    treated as a miss too – the cache must never break the fetch path.
+    """
+    path = _cache_path(url)
+    try:
+        if time.time() - path.stat().st_mtime > ttl:
+            return None
+        with gzip.open(path, "rb") as f:
+            return f.read()
+    except (OSError, EOFError, zlib.error):
+        return None
+
+
+def store(url: str, content: bytes) -> None:
+    """Store a response body for url (atomically, via temp file + rename)."""
+    _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _cache_path(url)
+    # Unique temp name per writer: concurrent processes storing the same key
+    # must not interleave into one file before the rename.
+    fd, tmp = tempfile.mkstemp(dir=_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wb") as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def clear_cache() -> None:
+    """Remove all cached metadata responses."""
+    if not _CACHE_DIR.is_dir():
+        return
+    for entry in _CACHE_DIR.iterdir():
+        if entry.suffix in {".gz", ".tmp"}:
+            entry.unlink(missing_ok=True)
@@ -1,14 +1,75 @@
 ﻿from __future__ import annotations
 
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, List, Optional
+from types import MappingProxyType
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
 
+import numpy as np
+import orjson
+import pandas as pd
 import requests
-from minio import Minio
+from requests.adapters import HTTPAdapter, Retry
 
-from config.loader import get_settings
+from config.loader import get_minio, get_settings
+from utils import metadata_cache
+
+try:
+    import ijson  # optional – enables incremental JSON parsing in iter_*
+except ImportError:
+    ijson = None
+
+# Copy buffer for streaming downloads: 4 MiB keeps the TCP window full and
+# amortizes the per-read() Python overhead on large .scu files.
+_DOWNLOAD_CHUNK = 4 * 1024 * 1024
+
+
+@lru_cache(maxsize=64)
+def _encode_static(pairs: Tuple[Tuple[str, Any], ...]) -> str:
+    """
+    URL-encode the paging-invariant query params once per combination.
+
+    When paginating, only limit/offset change between calls – the rest of
+    the query string is encoded here a single time and appended to.
+    """
+    return urlencode(pairs, doseq=True)
+
+
+@lru_cache(maxsize=256)
+def _to_utc_iso(dt: datetime) -> str:
+    """
+    Convert datetime → ISO-8601 with Z suffix.
+
+    Cached per timestamp (paginating loops resend the same from/to bounds),
+    with a strftime fast path that skips isoformat's "+00:00" rewrite for
+    whole-second timestamps.
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    elif dt.tzinfo is not timezone.utc:
+        dt = dt.astimezone(timezone.utc)
+    if dt.microsecond == 0:
+        return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+@lru_cache(maxsize=512)
+def _prefix_for_date(target_root: str, date_tuple: Tuple[int, int, int]) -> str:
+    """
+    Format <target_root>/<YYMMDD>/ for one UTC date.
+
+    Cached because notebook workflows hit the same handful of (root, day)
+    combinations over and over – the strftime-style formatting only runs once
+    per combination.
+    """
+    y, m, d = date_tuple
+    return f"{target_root}/{y % 100:02d}{m:02d}{d:02d}/"
 
 
 @dataclass
@@ -31,6 +92,7 @@ class RadarClient:
         self,
         api_base_url: str = "http://localhost:8030/heavyrain/data-api/api",
         api_token: Optional[str] = None,
+        cache_ttl: float = metadata_cache.DEFAULT_TTL_SECONDS,
     ) -> None:
         # Load shared settings (MinIO + radar paths)
         self.settings = get_settings()
@@ -46,34 +108,174 @@ class RadarClient:
         # plaintext token for RBAC – same as Swagger “Authorize”
         self.api_token = api_token or ""
 
-        # --- MinIO client ---
-        self._minio = Minio(**self.settings.radar.client.model_dump())
+        # Same auth header as Swagger (Authorization: Bearer <token>). The
+        # token never changes after construction, so build the dict once
+        # instead of per request; read-only proxy when there is no token.
+        self._headers = (
+            {"Authorization": f"Bearer {self.api_token}"}
+            if self.api_token
+            else MappingProxyType({})
+        )
+
+        # Pooled session with keep-alive: paginated /radar calls reuse one
+        # TCP/TLS connection instead of reconnecting per request.
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]
+            ),
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        # TTL for the on-disk metadata response cache (historical windows)
+        self._cache_ttl = cache_ttl
+
+        # --- MinIO client (shared across clients via get_minio) ---
+        self._minio = get_minio(**self.settings.radar.client.model_dump())
 
         # All radar products share the same bucket ("heavyrain")
         self._bucket = self.settings.radar.file_paths.nrw_q1.bucket_name
 
+        # Flatten (region, quality) → target root into a plain dict so the
+        # per-call lookup skips repeated pydantic attribute dispatch. Keys
+        # are stored pre-casefolded to match the lookup normalization.
+        fp = self.settings.radar.file_paths
+        self._target_roots = {
+            ("nrw", "q1"): fp.nrw_q1.target.rstrip("/"),
+            ("nrw", "q3"): fp.nrw_q3.target.rstrip("/"),
+            ("lfu", "q3"): fp.lfu_q3.target.rstrip("/"),
+            ("lfu_q3", "q3"): fp.lfu_q3.target.rstrip("/"),
+        }
+
     # ---------- internal helpers ----------
 
-    @property
-    def _headers(self) -> dict:
-        """
-        Use the same auth header as Swagger:
-        Authorization: Bearer <token>
+    def _download_object(self, object_name: str, dest_path: str) -> None:
         """
-        if not self.api_token:
-            return {}
-        return {"Authorization": f"Bearer {self.api_token}"}
+        Stream one object from MinIO straight to dest_path.
 
-    @staticmethod
-    def _to_utc_iso(dt: datetime) -> str:
-        """Convert datetime → ISO-8601 with Z suffix."""
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        dt = dt.astimezone(timezone.utc)
-        return dt.isoformat().replace("+00:00", "Z")
+        Uses get_object + copyfileobj with a large buffer instead of
+        fget_object, avoiding its temp-file rename and default small chunks.
+        """
+        resp = self._minio.get_object(self._bucket, object_name)
+        try:
+            with open(dest_path, "wb", buffering=0) as f:
+                shutil.copyfileobj(resp, f, length=_DOWNLOAD_CHUNK)
+        finally:
+            resp.close()
+            resp.release_conn()
 
     # ---------- public API: DB / HTTP ----------
 
+    def _radar_url(
+        self,
+        from_ts: Optional[datetime],
+        to_ts: Optional[datetime],
+        hours: int,
+        region: Optional[str],
+        quality: Optional[str],
+        limit: int,
+        offset: int,
+        order: str,
+    ) -> str:
+        """Build the full GET /radar URL, query string included."""
+        pairs = [("order", order)]
+
+        # Either explicit from/to OR "last N hours"
+        if from_ts is not None:
+            pairs.append(("from_ts", _to_utc_iso(from_ts)))
+        if to_ts is not None:
+            pairs.append(("to_ts", _to_utc_iso(to_ts)))
+        if from_ts is None and to_ts is None:
+            pairs.append(("hours", hours))
+
+        if region is not None:
+            pairs.append(("region", region))
+
+        if quality is not None:
+            pairs.append(("quality", quality))
+
+        static = _encode_static(tuple(pairs))
+        return f"{self.api_base_url}/radar?{static}&limit={limit}&offset={offset}"
+
+    def _fetch_radar_rows(
+        self,
+        from_ts: Optional[datetime],
+        to_ts: Optional[datetime],
+        hours: int,
+        region: Optional[str],
+        quality: Optional[str],
+        limit: int,
+        offset: int,
+        order: str,
+    ) -> List[dict]:
+        """GET /radar and return the raw JSON rows."""
+        url = self._radar_url(
+            from_ts, to_ts, hours, region, quality, limit, offset, order
+        )
+
+        # Historical windows are immutable – serve them from the on-disk
+        # cache across notebook sessions instead of re-hitting the API.
+        cacheable = metadata_cache.is_historical(to_ts)
+        if cacheable:
+            cached = metadata_cache.load(url, ttl=self._cache_ttl)
+            if cached is not None:
+                return orjson.loads(cached)
+
+        resp = self._session.get(url, headers=self._headers, timeout=60)
+        resp.raise_for_status()
+
+        if cacheable:
+            metadata_cache.store(url, resp.content)
+
+        # orjson decodes ~2x faster than the stdlib on 1000-row responses.
+        return orjson.loads(resp.content)
+
+    def iter_radar_metadata(
+        self,
+        from_ts: Optional[datetime] = None,
+        to_ts: Optional[datetime] = None,
+        *,
+        hours: int = 168,
+        region: Optional[str] = None,   # "NRW" or "LfU"
+        quality: Optional[str] = None,  # "Q1" or "Q3"
+        limit: int = 1000,
+        offset: int = 0,
+        order: str = "desc",
+    ) -> Iterator[RadarMetadata]:
+        """
+        Stream GET /radar and yield RadarMetadata rows as they arrive.
+
+        With ijson installed the body is parsed incrementally off the socket,
+        so row construction overlaps with the network receive and the full
+        response is never buffered twice. Without ijson the body is decoded
+        in one go and the rows are still yielded lazily.
+        """
+        url = self._radar_url(
+            from_ts, to_ts, hours, region, quality, limit, offset, order
+        )
+
+        resp = self._session.get(url, headers=self._headers, timeout=60, stream=True)
+        resp.raise_for_status()
+        try:
+            if ijson is not None:
+                resp.raw.decode_content = True  # transparent gzip/deflate
+                rows = ijson.items(resp.raw, "item")
+            else:
+                rows = resp.json()
+
+            for row in rows:
+                yield RadarMetadata(
+                    file_name=row["file_name"],
+                    sensing_start=datetime.fromisoformat(row["sensing_start"]),
+                    sensing_end=datetime.fromisoformat(row["sensing_end"]),
+                    region=row["region"],
+                )
+        finally:
+            resp.close()
+
     def list_radar_metadata(
         self,
         from_ts: Optional[datetime] = None,
@@ -90,43 +292,76 @@ class RadarClient:
         Call GET /radar and return a list of RadarMetadata objects.
         Mirrors the FastAPI endpoint in your API.
         """
-        params: dict = {
-            "limit": limit,
-            "offset": offset,
-            "order": order,
-        }
+        data = self._fetch_radar_rows(
+            from_ts, to_ts, hours, region, quality, limit, offset, order
+        )
 
-        # Either explicit from/to OR "last N hours"
-        if from_ts is not None:
-            params["from_ts"] = self._to_utc_iso(from_ts)
-        if to_ts is not None:
-            params["to_ts"] = self._to_utc_iso(to_ts)
-        if from_ts is None and to_ts is None:
-            params["hours"] = hours
+        if not data:
+            return []
 
-        if region is not None:
-            params["region"] = region
+        # Parse timestamps column-wise with pandas' C ISO-8601 parser instead
+        # of two datetime.fromisoformat calls per row.
+        df = pd.DataFrame(data)
+        starts = pd.to_datetime(df["sensing_start"], format="ISO8601", cache=True)
+        ends = pd.to_datetime(df["sensing_end"], format="ISO8601", cache=True)
 
-        if quality is not None:
-            params["quality"] = quality
+        return list(
+            map(
+                RadarMetadata,
+                df["file_name"],
+                pd.DatetimeIndex(starts).to_pydatetime(),
+                pd.DatetimeIndex(ends).to_pydatetime(),
+                df["region"],
+            )
+        )
 
-        url = f"{self.api_base_url}/radar"
+    def list_radar_metadata_columnar(
+        self,
+        from_ts: Optional[datetime] = None,
+        to_ts: Optional[datetime] = None,
+        *,
+        hours: int = 168,
+        region: Optional[str] = None,   # "NRW" or "LfU"
+        quality: Optional[str] = None,  # "Q1" or "Q3"
+        limit: int = 1000,
+        offset: int = 0,
+        order: str = "desc",
+    ) -> dict:
+        """
+        Like list_radar_metadata, but return columns instead of one object
+        per row: file names and regions as arrays, sensing times as UTC
+        datetime64 arrays. Regions are a pd.Categorical (only a handful of
+        distinct values), so time filters and group-bys in the notebooks work
+        on compact arrays instead of per-row dataclass attributes.
+        """
+        data = self._fetch_radar_rows(
+            from_ts, to_ts, hours, region, quality, limit, offset, order
+        )
 
-        resp = requests.get(url, params=params, headers=self._headers, timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
+        if not data:
+            return {
+                "file_name": np.array([], dtype=object),
+                "sensing_start": pd.DatetimeIndex([], tz="UTC").values,
+                "sensing_end": pd.DatetimeIndex([], tz="UTC").values,
+                "region": pd.Categorical([]),
+            }
+
+        df = pd.DataFrame(data)
+        return {
+            "file_name": df["file_name"].to_numpy(dtype=object),
+            "sensing_start": pd.to_datetime(
+                df["sensing_start"], format="ISO8601", cache=True, utc=True
+            ).values,
+            "sensing_end": pd.to_datetime(
+                df["sensing_end"], format="ISO8601", cache=True, utc=True
+            ).values,
+            "region": pd.Categorical(df["region"]),
+        }
 
-        out: List[RadarMetadata] = []
-        for row in data:
-            out.append(
-                RadarMetadata(
-                    file_name=row["file_name"],
-                    sensing_start=datetime.fromisoformat(row["sensing_start"]),
-                    sensing_end=datetime.fromisoformat(row["sensing_end"]),
-                    region=row["region"],
-                )
-            )
-        return out
+    @staticmethod
+    def clear_cache() -> None:
+        """Drop all on-disk metadata response cache entries."""
+        metadata_cache.clear_cache()
 
     # ---------- public API: MinIO download by file_name from DB ----------
 
@@ -134,26 +369,34 @@ class RadarClient:
         self,
         file_names: Iterable[str],
         destination_dir: Path,
+        max_workers: int = 8,
     ) -> List[Path]:
         """
         Download the given object paths from MinIO into destination_dir.
         'file_names' are taken directly from sat_radar.hr_radar_data.file_name.
-        """
-        dest_dir = Path(destination_dir)
-        dest_dir.mkdir(parents=True, exist_ok=True)
 
-        paths: List[Path] = []
-        for loc in file_names:
-            object_name = loc.lstrip("/")  # MinIO needs a relative key
-            filename = Path(object_name).name
-            dest_path = dest_dir / filename
-
-            self._minio.fget_object(
-                bucket_name=self._bucket,
-                object_name=object_name,
-                file_path=str(dest_path),
-            )
-            paths.append(dest_path)
+        Downloads run in a thread pool (the Minio client is thread-safe), so
+        I/O-bound transfers overlap instead of running one after another.
+        """
+        # Plain os.path string handling in the loop – Path construction and
+        # division allocate noticeably over hundreds of objects.
+        dest_str = str(destination_dir)
+        os.makedirs(dest_str, exist_ok=True)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = []
+            for loc in file_names:
+                object_name = loc.lstrip("/")  # MinIO needs a relative key
+                dest_path = os.path.join(dest_str, os.path.basename(object_name))
+
+                future = pool.submit(self._download_object, object_name, dest_path)
+                pending.append((dest_path, future))
+
+            # Collect in submission order so output matches input ordering.
+            paths: List[Path] = []
+            for dest_path, future in pending:
+                future.result()
+                paths.append(Path(dest_path))
 
         return paths
 
@@ -162,18 +405,16 @@ class RadarClient:
     def _resolve_target_root(self, region: str, quality: str) -> str:
         """
         Map (region, quality) → radar.file_paths.*.target
-        """
-        region = region.upper()
-        quality = quality.upper()
 
-        if region == "NRW" and quality == "Q1":
-            return self.settings.radar.file_paths.nrw_q1.target.rstrip("/")
-        if region == "NRW" and quality == "Q3":
-            return self.settings.radar.file_paths.nrw_q3.target.rstrip("/")
-        if region in {"LFU", "LFU_Q3"} and quality == "Q3":
-            return self.settings.radar.file_paths.lfu_q3.target.rstrip("/")
-
-        raise ValueError(f"Unsupported combination region={region!r}, quality={quality!r}")
+        Inputs are normalized with casefold (marginally faster than upper
+        for ASCII) against the pre-casefolded keys built in __init__.
+        """
+        try:
+            return self._target_roots[(region.casefold(), quality.casefold())]
+        except KeyError:
+            raise ValueError(
+                f"Unsupported combination region={region!r}, quality={quality!r}"
+            ) from None
 
     def build_prefix_for_datetime(self, region: str, quality: str, ts: datetime) -> str:
         """
@@ -187,49 +428,76 @@ class RadarClient:
             ts = ts.replace(tzinfo=timezone.utc)
         ts_utc = ts.astimezone(timezone.utc)
 
-        date_folder = ts_utc.strftime("%y%m%d")  # e.g. 250901
         root = self._resolve_target_root(region, quality)
-        return f"{root}/{date_folder}/"
+        return _prefix_for_date(root, (ts_utc.year, ts_utc.month, ts_utc.day))
 
-    def list_objects_for_datetime(self, region: str, quality: str, ts: datetime):
+    def iter_objects_for_datetime(self, region: str, quality: str, ts: datetime):
         """
-        List all MinIO objects under the generated prefix for a given date.
+        Iterate all MinIO objects under the generated prefix for a given date.
+
+        Returns the listing generator as-is, so consumers (and
+        download_by_datetime in particular) can start working on the first
+        objects while later listing pages are still being fetched.
         """
         prefix = self.build_prefix_for_datetime(region, quality, ts)
-        return list(
-            self._minio.list_objects(
-                bucket_name=self._bucket,
-                prefix=prefix,
-                recursive=True,
-            )
+        return self._minio.list_objects(
+            bucket_name=self._bucket,
+            prefix=prefix,
+            recursive=True,
         )
 
+    def list_objects_for_datetime(self, region: str, quality: str, ts: datetime):
+        """
+        List all MinIO objects under the generated prefix for a given date.
+        """
+        return list(self.iter_objects_for_datetime(region, quality, ts))
+
     def download_by_datetime(
         self,
         region: str,
         quality: str,
         ts: datetime,
         destination_dir: Path,
+        max_workers: int = 8,
+        force: bool = False,
     ) -> List[Path]:
         """
         Download all radar objects for the given region + quality + date.
         (Jira cell #2 requirement.)
-        """
-        dest_dir = Path(destination_dir)
-        dest_dir.mkdir(parents=True, exist_ok=True)
-
-        objs = self.list_objects_for_datetime(region, quality, ts)
-        result: List[Path] = []
 
-        for obj in objs:
-            filename = Path(obj.object_name).name
-            dest_path = dest_dir / filename
-
-            self._minio.fget_object(
-                bucket_name=self._bucket,
-                object_name=obj.object_name,
-                file_path=str(dest_path),
-            )
-            result.append(dest_path)
+        A day of .scu files can run into the hundreds, so transfers are
+        spread over a thread pool instead of downloaded serially. Files that
+        already exist locally with the expected size are skipped – re-running
+        a notebook cell for the same day only fetches what is missing. Pass
+        force=True to re-download everything.
+        """
+        dest_str = str(destination_dir)
+        os.makedirs(dest_str, exist_ok=True)
+
+        objs = self.iter_objects_for_datetime(region, quality, ts)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = []
+            for obj in objs:
+                dest_path = os.path.join(dest_str, os.path.basename(obj.object_name))
+
+                # list_objects already carries the object size – a matching
+                # local file means a previous run downloaded it completely.
+                if (
+                    not force
+                    and os.path.exists(dest_path)
+                    and os.path.getsize(dest_path) == obj.size
+                ):
+                    pending.append((dest_path, None))
+                    continue
+
+                future = pool.submit(self._download_object, obj.object_name, dest_path)
+                pending.append((dest_path, future))
+
+            result: List[Path] = []
+            for dest_path, future in pending:
+                if future is not None:
+                    future.result()
+                result.append(Path(dest_path))
 
         return result
@@ -1,14 +1,76 @@
 ﻿from __future__ import annotations
 
+import calendar
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, List, Optional
+from types import MappingProxyType
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
 
+import numpy as np
+import orjson
+import pandas as pd
 import requests
-from minio import Minio
+from requests.adapters import HTTPAdapter, Retry
 
-from config.loader import get_settings
+from config.loader import get_minio, get_settings
+from utils import metadata_cache
+
+try:
+    import ijson  # optional – enables incremental JSON parsing in iter_*
+except ImportError:
+    ijson = None
+
+# Copy buffer for streaming downloads: 4 MiB keeps the TCP window full and
+# amortizes the per-read() Python overhead on large GeoTIFFs.
+_DOWNLOAD_CHUNK = 4 * 1024 * 1024
+
+
+@lru_cache(maxsize=64)
+def _encode_static(pairs: Tuple[Tuple[str, Any], ...]) -> str:
+    """
+    URL-encode the paging-invariant query params once per combination.
+
+    When paginating, only limit/offset change between calls – the rest of
+    the query string is encoded here a single time and appended to.
+    """
+    return urlencode(pairs, doseq=True)
+
+
+@lru_cache(maxsize=256)
+def _to_utc_iso(dt: datetime) -> str:
+    """
+    Convert datetime → ISO-8601 with Z suffix.
+
+    Cached per timestamp (paginating loops resend the same from/to bounds),
+    with a strftime fast path that skips isoformat's "+00:00" rewrite for
+    whole-second timestamps.
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    elif dt.tzinfo is not timezone.utc:
+        dt = dt.astimezone(timezone.utc)
+    if dt.microsecond == 0:
+        return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+@lru_cache(maxsize=512)
+def _prefix_for_date(target_prefix: str, region: str, date_tuple: Tuple[int, int, int]) -> str:
+    """
+    Format <target_prefix>/<REGION>/<YYYY>/<MonthName>/<dd>/ for one UTC date.
+
+    Cached because notebook workflows hit the same handful of (region, day)
+    combinations over and over. calendar.month_name avoids the locale-aware
+    %B strftime lookup.
+    """
+    y, m, d = date_tuple
+    return f"{target_prefix}/{region}/{y:04d}/{calendar.month_name[m]}/{d:02d}/"
 
 
 @dataclass
@@ -30,6 +92,7 @@ class SatelliteClient:
         self,
         api_base_url: str = "http://localhost:8030/heavyrain/data-api/api",
         api_token: Optional[str] = None,
+        cache_ttl: float = metadata_cache.DEFAULT_TTL_SECONDS,
     ) -> None:
         # Load shared settings (MinIO + paths)
         self.settings = get_settings()
@@ -39,33 +102,156 @@ class SatelliteClient:
         # plaintext token for RBAC – fill in from env or by manual
         self.api_token = api_token or ""
 
-        # --- MinIO client ---
-        self._minio = Minio(**self.settings.sat.client.model_dump())
+        # Same auth header as Swagger (Authorization: Bearer <token>). The
+        # token never changes after construction, so build the dict once
+        # instead of per request; read-only proxy when there is no token.
+        self._headers = (
+            {"Authorization": f"Bearer {self.api_token}"}
+            if self.api_token
+            else MappingProxyType({})
+        )
+
+        # Pooled session with keep-alive: paginated /satellite calls reuse one
+        # TCP/TLS connection instead of reconnecting per request.
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]
+            ),
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        # TTL for the on-disk metadata response cache (historical windows)
+        self._cache_ttl = cache_ttl
+
+        # --- MinIO client (shared across clients via get_minio) ---
+        self._minio = get_minio(**self.settings.sat.client.model_dump())
         self._bucket = self.settings.sat.file_paths.raw.bucket_name
         self._target_prefix = self.settings.sat.file_paths.raw.target.rstrip("/")
 
     # ---------- internal helpers ----------
 
-    @property
-    def _headers(self) -> dict:
+    def _download_object(self, object_name: str, dest_path: str) -> None:
         """
-        Use the same auth header as Swagger:
-        Authorization: Bearer <token>
+        Stream one object from MinIO straight to dest_path.
+
+        Uses get_object + copyfileobj with a large buffer instead of
+        fget_object, avoiding its temp-file rename and default small chunks.
         """
-        if not self.api_token:
-            return {}
-        return {"Authorization": f"Bearer {self.api_token}"}
+        resp = self._minio.get_object(self._bucket, object_name)
+        try:
+            with open(dest_path, "wb", buffering=0) as f:
+                shutil.copyfileobj(resp, f, length=_DOWNLOAD_CHUNK)
+        finally:
+            resp.close()
+            resp.release_conn()
 
+    # ---------- public API: DB / HTTP ----------
 
-    @staticmethod
-    def _to_utc_iso(dt: datetime) -> str:
-        """Convert datetime → ISO-8601 with Z suffix."""
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        dt = dt.astimezone(timezone.utc)
-        return dt.isoformat().replace("+00:00", "Z")
+    def _satellite_url(
+        self,
+        from_ts: Optional[datetime],
+        to_ts: Optional[datetime],
+        hours: int,
+        region: Optional[str],
+        limit: int,
+        offset: int,
+        order: str,
+    ) -> str:
+        """Build the full GET /satellite URL, query string included."""
+        pairs = [("order", order)]
 
-    # ---------- public API: DB / HTTP ----------
+        # Either explicit from/to OR "last N hours"
+        if from_ts is not None:
+            pairs.append(("from_ts", _to_utc_iso(from_ts)))
+        if to_ts is not None:
+            pairs.append(("to_ts", _to_utc_iso(to_ts)))
+        if from_ts is None and to_ts is None:
+            pairs.append(("hours", hours))
+
+        if region is not None:
+            # must be "NRW" or "BOO"
+            pairs.append(("region", region))
+
+        static = _encode_static(tuple(pairs))
+        return f"{self.api_base_url}/satellite?{static}&limit={limit}&offset={offset}"
+
+    def _fetch_satellite_rows(
+        self,
+        from_ts: Optional[datetime],
+        to_ts: Optional[datetime],
+        hours: int,
+        region: Optional[str],
+        limit: int,
+        offset: int,
+        order: str,
+    ) -> List[dict]:
+        """GET /satellite and return the raw JSON rows."""
+        url = self._satellite_url(
+            from_ts, to_ts, hours, region, limit, offset, order
+        )
+
+        # Historical windows are immutable – serve them from the on-disk
+        # cache across notebook sessions instead of re-hitting the API.
+        cacheable = metadata_cache.is_historical(to_ts)
+        if cacheable:
+            cached = metadata_cache.load(url, ttl=self._cache_ttl)
+            if cached is not None:
+                return orjson.loads(cached)
+
+        resp = self._session.get(url, headers=self._headers, timeout=60)
+
+        resp.raise_for_status()
+
+        if cacheable:
+            metadata_cache.store(url, resp.content)
+
+        # orjson decodes ~2x faster than the stdlib on 1000-row responses.
+        return orjson.loads(resp.content)
+
+    def iter_satellite_metadata(
+        self,
+        from_ts: Optional[datetime] = None,
+        to_ts: Optional[datetime] = None,
+        *,
+        hours: int = 24,
+        region: Optional[str] = None,
+        limit: int = 1000,
+        offset: int = 0,
+        order: str = "desc",
+    ) -> Iterator[SatelliteMetadata]:
+        """
+        Stream GET /satellite and yield SatelliteMetadata rows as they arrive.
+
+        With ijson installed the body is parsed incrementally off the socket,
+        so row construction overlaps with the network receive and the full
+        response is never buffered twice. Without ijson the body is decoded
+        in one go and the rows are still yielded lazily.
+        """
+        url = self._satellite_url(
+            from_ts, to_ts, hours, region, limit, offset, order
+        )
+
+        resp = self._session.get(url, headers=self._headers, timeout=60, stream=True)
+        resp.raise_for_status()
+        try:
+            if ijson is not None:
+                resp.raw.decode_content = True  # transparent gzip/deflate
+                rows = ijson.items(resp.raw, "item")
+            else:
+                rows = resp.json()
+
+            for row in rows:
+                yield SatelliteMetadata(
+                    location=row["location"],
+                    sensing_start=datetime.fromisoformat(row["sensing_start"]),
+                    sensing_end=datetime.fromisoformat(row["sensing_end"]),
+                )
+        finally:
+            resp.close()
 
     def list_satellite_metadata(
         self,
@@ -82,41 +268,71 @@ class SatelliteClient:
         Call GET /satellite and return a list of SatelliteMetadata objects.
         Mirrors the FastAPI endpoint you showed.
         """
-        params: dict = {
-            "limit": limit,
-            "offset": offset,
-            "order": order,
-        }
+        data = self._fetch_satellite_rows(
+            from_ts, to_ts, hours, region, limit, offset, order
+        )
 
-        # Either explicit from/to OR "last N hours"
-        if from_ts is not None:
-            params["from_ts"] = self._to_utc_iso(from_ts)
-        if to_ts is not None:
-            params["to_ts"] = self._to_utc_iso(to_ts)
-        if from_ts is None and to_ts is None:
-            params["hours"] = hours
+        if not data:
+            return []
 
-        if region is not None:
-            # must be "NRW" or "BOO"
-            params["region"] = region
+        # Parse timestamps column-wise with pandas' C ISO-8601 parser instead
+        # of two datetime.fromisoformat calls per row.
+        df = pd.DataFrame(data)
+        starts = pd.to_datetime(df["sensing_start"], format="ISO8601", cache=True)
+        ends = pd.to_datetime(df["sensing_end"], format="ISO8601", cache=True)
 
-        url = f"{self.api_base_url}/satellite"
+        return list(
+            map(
+                SatelliteMetadata,
+                df["location"],
+                pd.DatetimeIndex(starts).to_pydatetime(),
+                pd.DatetimeIndex(ends).to_pydatetime(),
+            )
+        )
 
-        resp = requests.get(url, params=params, headers=self._headers, timeout=60)
+    def list_satellite_metadata_columnar(
+        self,
+        from_ts: Optional[datetime] = None,
+        to_ts: Optional[datetime] = None,
+        *,
+        hours: int = 24,
+        region: Optional[str] = None,
+        limit: int = 1000,
+        offset: int = 0,
+        order: str = "desc",
+    ) -> dict:
+        """
+        Like list_satellite_metadata, but return columns instead of one
+        object per row: locations as an array, sensing times as UTC
+        datetime64 arrays. Downstream time filtering in the notebooks then
+        works on compact arrays instead of per-row dataclass attributes.
+        """
+        data = self._fetch_satellite_rows(
+            from_ts, to_ts, hours, region, limit, offset, order
+        )
 
-        resp.raise_for_status()
-        data = resp.json()
+        if not data:
+            return {
+                "location": np.array([], dtype=object),
+                "sensing_start": pd.DatetimeIndex([], tz="UTC").values,
+                "sensing_end": pd.DatetimeIndex([], tz="UTC").values,
+            }
+
+        df = pd.DataFrame(data)
+        return {
+            "location": df["location"].to_numpy(dtype=object),
+            "sensing_start": pd.to_datetime(
+                df["sensing_start"], format="ISO8601", cache=True, utc=True
+            ).values,
+            "sensing_end": pd.to_datetime(
+                df["sensing_end"], format="ISO8601", cache=True, utc=True
+            ).values,
+        }
 
-        out: List[SatelliteMetadata] = []
-        for row in data:
-            out.append(
-                SatelliteMetadata(
-                    location=row["location"],
-                    sensing_start=datetime.fromisoformat(row["sensing_start"]),
-                    sensing_end=datetime.fromisoformat(row["sensing_end"]),
-                )
-            )
-        return out
+    @staticmethod
+    def clear_cache() -> None:
+        """Drop all on-disk metadata response cache entries."""
+        metadata_cache.clear_cache()
 
     # ---------- public API: MinIO download by location ----------
 
@@ -124,26 +340,34 @@ class SatelliteClient:
         self,
         locations: Iterable[str],
         destination_dir: Path,
+        max_workers: int = 8,
     ) -> List[Path]:
         """
         Download the given object "location" paths from MinIO into destination_dir.
         'locations' are taken directly from hr_satellite_data.location.
-        """
-        dest_dir = Path(destination_dir)
-        dest_dir.mkdir(parents=True, exist_ok=True)
-
-        paths: List[Path] = []
-        for loc in locations:
-            object_name = loc.lstrip("/")          # safety – MinIO needs relative key
-            filename = Path(object_name).name
-            dest_path = dest_dir / filename
 
-            self._minio.fget_object(
-                bucket_name=self._bucket,
-                object_name=object_name,
-                file_path=str(dest_path),
-            )
-            paths.append(dest_path)
+        Downloads run in a thread pool (the Minio client is thread-safe), so
+        I/O-bound transfers overlap instead of running one after another.
+        """
+        # Plain os.path string handling in the loop – Path construction and
+        # division allocate noticeably over hundreds of objects.
+        dest_str = str(destination_dir)
+        os.makedirs(dest_str, exist_ok=True)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = []
+            for loc in locations:
+                object_name = loc.lstrip("/")      # safety – MinIO needs relative key
+                dest_path = os.path.join(dest_str, os.path.basename(object_name))
+
+                future = pool.submit(self._download_object, object_name, dest_path)
+                pending.append((dest_path, future))
+
+            # Collect in submission order so output matches input ordering.
+            paths: List[Path] = []
+            for dest_path, future in pending:
+                future.result()
+                paths.append(Path(dest_path))
 
         return paths
 
@@ -161,50 +385,75 @@ class SatelliteClient:
             ts = ts.replace(tzinfo=timezone.utc)
         ts_utc = ts.astimezone(timezone.utc)
 
-        yyyy = ts_utc.strftime("%Y")
-        month_name = ts_utc.strftime("%B")
-        dd = ts_utc.strftime("%d")
+        return _prefix_for_date(
+            self._target_prefix, region, (ts_utc.year, ts_utc.month, ts_utc.day)
+        )
 
-        return f"{self._target_prefix}/{region}/{yyyy}/{month_name}/{dd}/"
+    def iter_objects_for_datetime(self, region: str, ts: datetime):
+        """
+        Iterate all MinIO objects under the generated prefix for a given date.
+
+        Returns the listing generator as-is, so consumers (and
+        download_by_datetime in particular) can start working on the first
+        objects while later listing pages are still being fetched.
+        """
+        prefix = self.build_prefix_for_datetime(region, ts)
+        return self._minio.list_objects(
+            bucket_name=self._bucket,
+            prefix=prefix,
+            recursive=True,
+        )
 
     def list_objects_for_datetime(self, region: str, ts: datetime):
         """
         List all MinIO objects under the generated prefix for a given date.
         """
-        prefix = self.build_prefix_for_datetime(region, ts)
-        return list(
-            self._minio.list_objects(
-                bucket_name=self._bucket,
-                prefix=prefix,
-                recursive=True,
-            )
-        )
+        return list(self.iter_objects_for_datetime(region, ts))
 
     def download_by_datetime(
         self,
         region: str,
         ts: datetime,
         destination_dir: Path,
+        max_workers: int = 8,
+        force: bool = False,
     ) -> List[Path]:
         """
         Download all objects for the given region + date.
         (This corresponds to the “generate path from datetime + region” requirement.)
-        """
-        dest_dir = Path(destination_dir)
-        dest_dir.mkdir(parents=True, exist_ok=True)
-
-        objs = self.list_objects_for_datetime(region, ts)
-        result: List[Path] = []
 
-        for obj in objs:
-            filename = Path(obj.object_name).name
-            dest_path = dest_dir / filename
-
-            self._minio.fget_object(
-                bucket_name=self._bucket,
-                object_name=obj.object_name,
-                file_path=str(dest_path),
-            )
-            result.append(dest_path)
+        Transfers are spread over a thread pool instead of downloaded
+        serially. Files that already exist locally with the expected size are
+        skipped – re-running a notebook cell for the same day only fetches
+        what is missing. Pass force=True to re-download everything.
+        """
+        dest_str = str(destination_dir)
+        os.makedirs(dest_str, exist_ok=True)
+
+        objs = self.iter_objects_for_datetime(region, ts)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = []
+            for obj in objs:
+                dest_path = os.path.join(dest_str, os.path.basename(obj.object_name))
+
+                # list_objects already carries the object size – a matching
+                # local file means a previous run downloaded it completely.
+                if (
+                    not force
+                    and os.path.exists(dest_path)
+                    and os.path.getsize(dest_path) == obj.size
+                ):
+                    pending.append((dest_path, None))
+                    continue
+
+                future = pool.submit(self._download_object, obj.object_name, dest_path)
+                pending.append((dest_path, future))
+
+            result: List[Path] = []
+            for dest_path, future in pending:
+                if future is not None:
+                    future.result()
+                result.append(Path(dest_path))
 
         return result